@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from books.models import Hold
+
+
+class Command(BaseCommand):
+    """
+    Pass on the copies set aside for holds that were not picked up within HOLD_PICKUP_DAYS days.
+    borrowBook and placeHold already do this for the book they touch; run this periodically (e.g. daily) to cover the other books.
+    """
+
+    help = "Expire allocated holds that were not picked up in time and pass their copies to the next hold."
+
+    def handle(self, *args, **options):
+        expired = Hold.expire_allocated()
+        self.stdout.write(f"Expired {expired} holds.")
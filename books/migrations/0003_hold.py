@@ -0,0 +1,35 @@
+# Generated by Django 3.2 on 2026-10-19 16:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('books', '0002_borrowedbook_student'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('waiting', 'waiting'), ('allocated', 'allocated'), ('fulfilled', 'fulfilled')], default='waiting', max_length=10, verbose_name='status')),
+                ('placed_date', models.DateTimeField(verbose_name='hold placed date')),
+                ('allocated_date', models.DateTimeField(blank=True, null=True, verbose_name='copy allocated date')),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='books.book', verbose_name='book')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='student')),
+            ],
+            options={
+                'verbose_name': 'hold',
+                'verbose_name_plural': 'holds',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='hold',
+            index=models.Index(fields=['book', 'status', 'placed_date'], name='books_hold_book_id_0bc22c_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-19 16:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_hold'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrowedbook',
+            index=models.Index(fields=['student', 'return_date', 'due_date'], name='books_borro_student_21a3c6_idx'),
+        ),
+    ]
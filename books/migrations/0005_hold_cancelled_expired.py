@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-19 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0004_borrowedbook_student_return_date_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hold',
+            name='status',
+            field=models.CharField(choices=[('waiting', 'waiting'), ('allocated', 'allocated'), ('fulfilled', 'fulfilled'), ('cancelled', 'cancelled'), ('expired', 'expired')], default='waiting', max_length=10, verbose_name='status'),
+        ),
+    ]
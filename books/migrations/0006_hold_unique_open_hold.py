@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-19 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0005_hold_cancelled_expired'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='hold',
+            constraint=models.UniqueConstraint(condition=models.Q(status__in=['waiting', 'allocated']), fields=('student', 'book'), name='unique_open_hold_per_student_book'),
+        ),
+    ]
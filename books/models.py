@@ -1,6 +1,9 @@
+from datetime import timedelta
+
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from django.db import models
+from django.db import models, transaction
 
 
 class Book(models.Model):
@@ -18,6 +21,22 @@ class Book(models.Model):
 
     def __str__(self):
         return self.name
+    
+    def allocate_returned_copy(self):
+        """
+        Set a returned copy aside for the oldest waiting hold, or make it available again if nobody is waiting.
+        Must be called inside a transaction, with the book locked by select_for_update.
+        Returns the hold the copy was allocated to, if any.
+        """
+        hold = self.hold_set.select_for_update().filter(status=Hold.WAITING).order_by('placed_date', 'id').first()
+        if hold is not None:
+            hold.status = Hold.ALLOCATED
+            hold.allocated_date = timezone.now()
+            hold.save()
+            return hold
+        self.available_qty += 1
+        self.save()
+        return None
 
 
 class BorrowedBook(models.Model):
@@ -35,6 +54,83 @@ class BorrowedBook(models.Model):
     class Meta:
         verbose_name = _("borrowed books")
         verbose_name_plural = _("borrowed books")
+        # a student's current loans (return_date is null) are looked up with this index
+        indexes = [
+            models.Index(fields=['student', 'return_date', 'due_date']),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class Hold(models.Model):
+    """
+    A student's place in the queue for a book that is fully borrowed out.
+    Holds are served first in, first out: when a copy is returned, it is allocated to the oldest waiting hold instead of being made available again.
+    A copy that is not picked up within HOLD_PICKUP_DAYS days is passed on to the next waiting hold.
+    """
+    
+    WAITING = 'waiting'
+    ALLOCATED = 'allocated'
+    FULFILLED = 'fulfilled'
+    CANCELLED = 'cancelled'
+    EXPIRED = 'expired'
+    
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, verbose_name=_("student"), on_delete=models.CASCADE)
+    book = models.ForeignKey(Book, verbose_name=_("book"), on_delete=models.CASCADE)
+    status = models.CharField(_("status"), max_length=10, choices=[(WAITING, 'waiting'), (ALLOCATED, 'allocated'), (FULFILLED, 'fulfilled'), (CANCELLED, 'cancelled'), (EXPIRED, 'expired')], default=WAITING)
+    placed_date = models.DateTimeField(_("hold placed date"), auto_now=False, auto_now_add=False)
+    allocated_date = models.DateTimeField(_("copy allocated date"), auto_now=False, auto_now_add=False, blank=True, null=True)
+    
+    class Meta:
+        verbose_name = _("hold")
+        verbose_name_plural = _("holds")
+        # the next hold to allocate for a book is found with this index, without scanning the rest of the queue
+        indexes = [
+            models.Index(fields=['book', 'status', 'placed_date']),
+        ]
+        # a student can only be in the queue for a book once
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'book'],
+                condition=models.Q(status__in=['waiting', 'allocated']),
+                name='unique_open_hold_per_student_book',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.book}"
+    
+    def release(self, status):
+        """
+        End the hold with the given status (CANCELLED or EXPIRED).
+        If a copy was set aside for it, the copy goes to the next waiting hold, or becomes available again.
+        Must be called inside a transaction, with the book locked by select_for_update.
+        """
+        was_allocated = self.status == Hold.ALLOCATED
+        self.status = status
+        self.save()
+        if was_allocated:
+            self.book.allocate_returned_copy()
+    
+    @classmethod
+    def expire_allocated(cls, book_id=None):
+        """
+        Release the allocated holds whose copy has not been picked up within HOLD_PICKUP_DAYS days, optionally only for one book.
+        Returns the number of holds expired.
+        """
+        cutoff = timezone.now() - timedelta(days=settings.HOLD_PICKUP_DAYS)
+        holds = cls.objects.filter(status=cls.ALLOCATED, allocated_date__lt=cutoff)
+        if book_id is not None:
+            holds = holds.filter(book_id=book_id)
+        
+        expired = 0
+        for hold_id, hold_book_id in holds.values_list('id', 'book_id'):
+            with transaction.atomic():
+                Book.objects.select_for_update().get(id=hold_book_id)
+                hold = cls.objects.select_for_update().get(id=hold_id)
+                # the copy may have been picked up since the holds were listed
+                if hold.status == cls.ALLOCATED:
+                    hold.release(cls.EXPIRED)
+                    expired += 1
+        return expired
@@ -6,13 +6,19 @@ from graphene_django import DjangoObjectType
 from graphene_django.filter import DjangoFilterConnectionField
 from graphql import GraphQLError
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from .models import Book, BorrowedBook
+from .models import Book, BorrowedBook, Hold
 
 # get the user model
 User = get_user_model()
 
+# maximum number of books a student can have borrowed at the same time
+MAX_BORROWED_BOOKS = 10
+
 
 class BookFilter(django_filters.FilterSet):
     """ 
@@ -56,12 +62,23 @@ class BorrowedBookFilter(django_filters.FilterSet):
     """ 
     Relay allows filtering of data by using filters.
     The fields defined are the filter sets which can be used as arguments when queyring the data.
+    The active and overdue filters select books that have not been returned yet, and those among them that are past their due date.
     """
     
+    active = django_filters.BooleanFilter(method='filter_active')
+    overdue = django_filters.BooleanFilter(method='filter_overdue')
+    
     class Meta:
         model = BorrowedBook
         fields = "__all__"
         
+    def filter_active(self, queryset, name, value):
+        return queryset.filter(return_date__isnull=value)
+    
+    def filter_overdue(self, queryset, name, value):
+        overdue = Q(return_date__isnull=True, due_date__lt=timezone.now())
+        return queryset.filter(overdue) if value else queryset.exclude(overdue)
+        
         
 class BorrowedBookNode(DjangoObjectType):
     """
@@ -78,6 +95,13 @@ class BorrowedBookNode(DjangoObjectType):
         model = BorrowedBook
         interfaces = (graphene.relay.Node,)
         
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        """
+        Fetch the book and the student in the same query, so listing borrowed books does not run a query per edge.
+        """
+        return queryset.select_related('book', 'student')
+        
         
 class BorrowedBookFilterConnectionField(DjangoFilterConnectionField):
     """
@@ -89,6 +113,47 @@ class BorrowedBookFilterConnectionField(DjangoFilterConnectionField):
         model = BorrowedBook
         filterset_class = BookFilter
 
+
+class HoldFilter(django_filters.FilterSet):
+    """ 
+    Relay allows filtering of data by using filters.
+    The fields defined are the filter sets which can be used as arguments when queyring the data.
+    """
+    
+    class Meta:
+        model = Hold
+        fields = "__all__"
+        
+        
+class HoldNode(DjangoObjectType):
+    """
+    The Node class exposes data in a Relay framework.
+    Graphene will automatically map the model's fields onto the node.
+    A hold with the status ALLOCATED has a returned copy set aside for the student, ready to be borrowed.
+    """
+    
+    class Meta:
+        model = Hold
+        interfaces = (graphene.relay.Node,)
+        
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        """
+        Fetch the book in the same query, so listing holds does not run a query per edge.
+        """
+        return queryset.select_related('book')
+        
+        
+class HoldFilterConnectionField(DjangoFilterConnectionField):
+    """
+    Subclass of DjangoFilterConnectionField.
+    Defines the connection field, which implements the pagination structure.
+    """
+    
+    class Meta:
+        model = Hold
+        filterset_class = HoldFilter
+
     
         
         
@@ -98,6 +163,7 @@ class BorrowBook(graphene.relay.ClientIDMutation):
     Pass in the book id, the student id, and optionally a renew flag as the input for book borrowing.
     
     Returns an error if the book has fully been borrowed out or if the student has already reached the maximum number of books allowed to borrow.
+    A student whose hold on the book has been allocated a returned copy can borrow it even though the book is fully borrowed out.
     """
     
     borrowed_book: BorrowedBook = graphene.Field(BorrowedBookNode)
@@ -113,53 +179,72 @@ class BorrowBook(graphene.relay.ClientIDMutation):
     @user_passes_test(lambda user: user.role == "librarian")
     def mutate_and_get_payload(root, info, **input):
         book_id = input.get('book_id')
-        book = Book.objects.get(id=book_id)
-        student_id = input.get('student_id')
-        student = User.objects.get(id=student_id)
-        renew = input.get('renew')
+        # pass on copies that were set aside for holds but not picked up in time, before reading the book
+        # this runs in its own transactions, so the expiry is kept even if the borrow below is refused
+        Hold.expire_allocated(book_id=book_id)
         
-        # check if renew argument is not passed in
-        if renew == None:
-            renew = False
+        with transaction.atomic():
+            # lock the book so concurrent borrows and returns cannot overwrite each other's available_qty update
+            book = Book.objects.select_for_update().get(id=book_id)
+            student_id = input.get('student_id')
+            student = User.objects.get(id=student_id)
+            renew = input.get('renew')
         
-        # get all borrowed books for the student
-        borrowed_books = BorrowedBook.objects.filter(student=student, return_date__isnull=True)
+            # check if renew argument is not passed in
+            if renew == None:
+                renew = False
+        
+            # get all borrowed books for the student, evaluated once so the checks below do not query again
+            borrowed_books = list(BorrowedBook.objects.filter(student=student, return_date__isnull=True))
+            # get the student's open hold on the book, which is fulfilled by this borrow
+            # the hold is locked as well, so two concurrent borrows cannot both use the same set-aside copy
+            hold = None if renew else Hold.objects.select_for_update().filter(student=student, book=book, status__in=[Hold.WAITING, Hold.ALLOCATED]).first()
+            # only a hold that has been allocated a returned copy lets the student borrow a fully borrowed out book
+            allocated = hold is not None and hold.status == Hold.ALLOCATED
         
 
-        # check if student has already borrowed and renewed the book
-        if book.id in [borrowed_book.book.id for borrowed_book in borrowed_books if borrowed_book.is_renewed]:
-            raise GraphQLError(_("Student has already renewed this book."))
-        # check if the book is fully borrowed out
-        elif book.available_qty == 0:
-            earliest_due_date = book.borrowedbook_set.filter(return_date__isnull=True).order_by('due_date')[0].due_date
-            raise GraphQLError(_(f"The book {book.name} is not available. The earliest date it will be available is on {earliest_due_date}."))
-        # check if the student has reached the maximum number of books allowed to borrow
-        elif borrowed_books.count() == 10:
-            raise GraphQLError(_("Student has already borrowed 10 books."))
-        # if all checks pass, allow student to borrow the book
-        elif book.available_qty > 0 and borrowed_books.count() < 10:
-            # check if student can still renew book borrowing
-            if renew:
-                borrowed_book = book.borrowedbook_set.get(student=student, return_date__isnull=True)
-                if datetime.now() > borrowed_book.due_date:
-                    raise GraphQLError(_("The book cannot be renewed anymore."))
+            # check if student has already borrowed and renewed the book
+            if book.id in [borrowed_book.book_id for borrowed_book in borrowed_books if borrowed_book.is_renewed]:
+                raise GraphQLError(_("Student has already renewed this book."))
+            # check if the book is fully borrowed out
+            elif book.available_qty == 0 and not allocated:
+                earliest_loan = book.borrowedbook_set.filter(return_date__isnull=True).order_by('due_date').first()
+                # every copy has been returned, but they are all set aside for students holding the book
+                if earliest_loan is None:
+                    raise GraphQLError(_(f"The book {book.name} is not available. The returned copies are reserved for students holding it. Place a hold on it to get the next returned copy."))
+                raise GraphQLError(_(f"The book {book.name} is not available. The earliest date it will be available is on {earliest_loan.due_date}. Place a hold on it to get the next returned copy."))
+            # check if the student has reached the maximum number of books allowed to borrow
+            elif len(borrowed_books) == MAX_BORROWED_BOOKS:
+                raise GraphQLError(_(f"Student has already borrowed {MAX_BORROWED_BOOKS} books."))
+            # if all checks pass, allow student to borrow the book
+            elif (book.available_qty > 0 or allocated) and len(borrowed_books) < MAX_BORROWED_BOOKS:
+                # check if student can still renew book borrowing
+                if renew:
+                    borrowed_book = book.borrowedbook_set.get(student=student, return_date__isnull=True)
+                    if datetime.now() > borrowed_book.due_date:
+                        raise GraphQLError(_("The book cannot be renewed anymore."))
                 
-            # create a new borrowed book
-            borrow_book = BorrowedBook(
-                student=student,
-                book=book,
-                borrow_date=datetime.now(),
-                due_date=datetime.now() + timedelta(days=30),
-                is_renewed=renew
-            )
-            borrow_book.save()
+                # create a new borrowed book
+                borrow_book = BorrowedBook(
+                    student=student,
+                    book=book,
+                    borrow_date=datetime.now(),
+                    due_date=datetime.now() + timedelta(days=30),
+                    is_renewed=renew
+                )
+                borrow_book.save()
             
-            # if renew is False, update the book's available qty, else  available_qty remains unchanged
-            if not renew:
-                book.available_qty -= 1
-                book.save()
+                # the student no longer needs a place in the queue once they have the book
+                if hold is not None:
+                    hold.status = Hold.FULFILLED
+                    hold.save()
+                # the copy set aside for an allocated hold was never made available, so only the hold is updated
+                # if renew is False, update the book's available qty, else  available_qty remains unchanged
+                if not allocated and not renew:
+                    book.available_qty -= 1
+                    book.save()
             
-            return BorrowBook(borrowed_book=borrow_book, success=True)
+                return BorrowBook(borrowed_book=borrow_book, success=True)
         
         
 class ReturnBook(graphene.relay.ClientIDMutation):
@@ -167,6 +252,8 @@ class ReturnBook(graphene.relay.ClientIDMutation):
     Create an entry for book returns. In order to create an entry, user must be logged in and must be a librarian to create an entry.
     Pass in the book id and the student id as the input for book borrowing.
     
+    If students are holding the book, the returned copy is allocated to the oldest waiting hold instead of being made available again.
+    
     Returns an error if the book has fully been borrowed out or if the student has already reached the maximum number of books allowed to borrow.
     """
     
@@ -179,9 +266,11 @@ class ReturnBook(graphene.relay.ClientIDMutation):
         
     @login_required
     @user_passes_test(lambda user: user.role == "librarian")
+    @transaction.atomic
     def mutate_and_get_payload(root, info, **input):
         book_id = input.get('book_id')
-        book = Book.objects.get(id=book_id)
+        # lock the book (as BorrowBook does) so concurrent returns cannot allocate copies to the same hold or lose an available_qty update
+        book = Book.objects.select_for_update().get(id=book_id)
         student_id = input.get('student_id')
         student = User.objects.get(id=student_id)
         
@@ -189,7 +278,7 @@ class ReturnBook(graphene.relay.ClientIDMutation):
         borrowed_books = BorrowedBook.objects.filter(student=student, return_date__isnull=True)
         
         # check if the book being returned is in the list of books borrowed by the student
-        if book.id not in [borrowed_book.book.id for borrowed_book in borrowed_books]:
+        if book.id not in [borrowed_book.book_id for borrowed_book in borrowed_books]:
             raise GraphQLError(_("Student does not have this book borrowed."))
         else:
             # get the borrowed book
@@ -197,12 +286,101 @@ class ReturnBook(graphene.relay.ClientIDMutation):
             # set the return date
             borrowed_book.return_date = datetime.now()
             borrowed_book.save()
-            # update the book available qty
-            book.available_qty += 1
-            # save the returned book record
-            book.save()
+            # allocate the returned copy to the oldest waiting hold, or update the book available qty if there is none
+            book.allocate_returned_copy()
             return ReturnBook(borrowed_book=borrowed_book, success=True)
+
+
+class PlaceHold(graphene.relay.ClientIDMutation):
+    """
+    Place a hold on a book that is fully borrowed out. In order to place a hold, user must be logged in as a student.
+    Pass in the book id as the input for placing a hold.
+    
+    Holds are served first in, first out: the next returned copy of the book is set aside for the oldest waiting hold, which shows up as ALLOCATED in myHolds.
+    The copy must be borrowed within HOLD_PICKUP_DAYS days, after which the hold is EXPIRED and the copy goes to the next hold.
+    Returns an error if the book is available, or if the student already holds or has borrowed the book.
+    """
+    
+    hold: Hold = graphene.Field(HoldNode)
+    success: bool = graphene.Boolean()
+    
+    class Input:
+        book_id = graphene.ID(required=True)
+        
+    @login_required
+    @user_passes_test(lambda user: user.role == "student")
+    def mutate_and_get_payload(root, info, **input):
+        book_id = input.get('book_id')
+        # an expired hold may have made a copy available again
+        # this runs in its own transactions, so the expiry is kept even if the hold below is refused
+        Hold.expire_allocated(book_id=book_id)
         
+        with transaction.atomic():
+            # lock the book so a concurrent return cannot allocate a copy before the hold joins the queue,
+            # and so two concurrent requests from the same student cannot both place a hold
+            book = Book.objects.select_for_update().get(id=book_id)
+            student = info.context.user
+        
+            # check if the book can be borrowed right away
+            if book.available_qty > 0:
+                raise GraphQLError(_(f"The book {book.name} is available and can be borrowed right away."))
+            # check if the student is already in the queue for the book
+            elif book.hold_set.filter(student=student, status__in=[Hold.WAITING, Hold.ALLOCATED]).exists():
+                raise GraphQLError(_("Student already has a hold on this book."))
+            # check if the student already has the book
+            elif book.borrowedbook_set.filter(student=student, return_date__isnull=True).exists():
+                raise GraphQLError(_("Student has already borrowed this book."))
+            else:
+                hold = Hold(
+                    student=student,
+                    book=book,
+                    placed_date=timezone.now(),
+                )
+                hold.save()
+                return PlaceHold(hold=hold, success=True)
+
+
+class CancelHold(graphene.relay.ClientIDMutation):
+    """
+    Cancel a hold on a book. In order to cancel a hold, user must be logged in as a student.
+    Pass in the book id as the input for cancelling the hold.
+    
+    If a returned copy was set aside for the hold, it goes to the next waiting hold, or becomes available again.
+    Returns an error if the student has no waiting or allocated hold on the book.
+    """
+    
+    hold: Hold = graphene.Field(HoldNode)
+    success: bool = graphene.Boolean()
+    
+    class Input:
+        book_id = graphene.ID(required=True)
+        
+    @login_required
+    @user_passes_test(lambda user: user.role == "student")
+    @transaction.atomic
+    def mutate_and_get_payload(root, info, **input):
+        book_id = input.get('book_id')
+        # lock the book, since cancelling an allocated hold passes its copy on
+        book = Book.objects.select_for_update().get(id=book_id)
+        student = info.context.user
+        
+        hold = book.hold_set.select_for_update().filter(student=student, status__in=[Hold.WAITING, Hold.ALLOCATED]).first()
+        if hold is None:
+            raise GraphQLError(_("Student does not have a hold on this book."))
+        hold.release(Hold.CANCELLED)
+        return CancelHold(hold=hold, success=True)
+        
+
+class LoanSummary(graphene.ObjectType):
+    """
+    Summary of a student's current loans, computed with a single aggregate query.
+    """
+    
+    active_count = graphene.Int(description="Number of books borrowed and not returned yet")
+    overdue_count = graphene.Int(description="Number of borrowed books past their due date")
+    next_due_date = graphene.DateTime(description="Earliest upcoming due date of the borrowed books")
+    remaining_quota = graphene.Int(description="Number of books the student can still borrow")
+    
 
 class BookQuery(graphene.ObjectType):
     """
@@ -213,6 +391,8 @@ class BookQuery(graphene.ObjectType):
     books = BookFilterConnectionField(BookNode, filterset_class=BookFilter, description="List of books")
     borrowed_books = BorrowedBookFilterConnectionField(BorrowedBookNode, filterset_class=BorrowedBookFilter, description="List of borrowed books")
     my_books = BorrowedBookFilterConnectionField(BorrowedBookNode, filterset_class=BorrowedBookFilter, description="List of student's borrowed books. Must be logged in as a student to access this field.")
+    my_loan_summary = graphene.Field(LoanSummary, description="Summary of the student's current loans. Must be logged in as a student to access this field.")
+    my_holds = HoldFilterConnectionField(HoldNode, filterset_class=HoldFilter, description="List of student's holds. Must be logged in as a student to access this field.")
     
     @login_required
     @user_passes_test(lambda user: user.role == "student")
@@ -222,6 +402,28 @@ class BookQuery(graphene.ObjectType):
         """
         return BorrowedBook.objects.filter(student=info.context.user)
     
+    @login_required
+    @user_passes_test(lambda user: user.role == "student")
+    def resolve_my_loan_summary(self, info, **kwargs):
+        """
+        The resolve_my_loan_summary method counts the logged-in student's active and overdue books and finds the next due date in one query.
+        """
+        now = timezone.now()
+        summary = BorrowedBook.objects.filter(student=info.context.user, return_date__isnull=True).aggregate(
+            active_count=Count('id'),
+            overdue_count=Count('id', filter=Q(due_date__lt=now)),
+            next_due_date=Min('due_date', filter=Q(due_date__gte=now)),
+        )
+        return LoanSummary(remaining_quota=max(MAX_BORROWED_BOOKS - summary['active_count'], 0), **summary)
+    
+    @login_required
+    @user_passes_test(lambda user: user.role == "student")
+    def resolve_my_holds(self, info, **kwargs):
+        """
+        The resolve_my_holds method is used to resolve the holds query for a particular logged-in student, oldest first.
+        """
+        return Hold.objects.filter(student=info.context.user).order_by('placed_date', 'id')
+    
 
 class BookMutation(graphene.ObjectType):
     """
@@ -229,4 +431,6 @@ class BookMutation(graphene.ObjectType):
     """
     
     borrow_book = BorrowBook.Field()
-    return_book = ReturnBook.Field()
\ No newline at end of file
+    return_book = ReturnBook.Field()
+    place_hold = PlaceHold.Field()
+    cancel_hold = CancelHold.Field()
\ No newline at end of file
@@ -1,3 +1,401 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from itertools import count
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from graphql_jwt.testcases import JSONWebTokenTestCase
+
+from school_library.testcases import QueryBudgetTestCase
+
+from .models import Book, BorrowedBook, Hold
+
+# get the user model
+User = get_user_model()
+
+# used to give every seeded row a unique name
+sequence = count()
+
+
+class BookQueryBudgetTest(QueryBudgetTestCase):
+    """
+    SQL query budgets for the book queries and mutations.
+    """
+
+    fixtures = ["users_seed.json", "books_seed.json"]
+
+    def setUp(self):
+        self.student = User.objects.get(username="student1")
+        self.librarian = User.objects.get(username="librarian1")
+        self.grow_rows(2)
+
+    def create_book(self, qty=5):
+        return Book.objects.create(name=f"Seeded Book {next(sequence)}", qty=qty, available_qty=qty)
+
+    def create_loan(self, student, book, is_renewed=False, overdue=False):
+        borrow_date = timezone.now() - timedelta(days=40 if overdue else 0)
+        book.available_qty -= 1
+        book.save()
+        return BorrowedBook.objects.create(
+            student=student,
+            book=book,
+            borrow_date=borrow_date,
+            due_date=borrow_date + timedelta(days=30),
+            is_renewed=is_renewed,
+        )
+
+    def create_student(self):
+        return User.objects.create_user(username=f"seeded_student{next(sequence)}", role="student")
+
+    def create_hold(self, student, book):
+        return Hold.objects.create(student=student, book=book, placed_date=timezone.now())
+
+    def create_borrowed_out_book(self):
+        """
+        Create a book whose only copy is borrowed by another student.
+        """
+        book = self.create_book(qty=1)
+        self.create_loan(self.create_student(), book)
+        return book
+
+    def grow_rows(self, count):
+        for i in range(count):
+            other_student = self.create_student()
+            # the logged in student keeps some renewed loans, since those are looked up while borrowing
+            self.create_loan(self.student, self.create_book(), is_renewed=i % 2 == 0, overdue=i % 3 == 0)
+            self.create_loan(other_student, self.create_book())
+            self.create_hold(self.student, self.create_borrowed_out_book())
+            self.create_hold(other_student, self.create_borrowed_out_book())
+
+    def test_books(self):
+        query = """
+            query {
+                books {
+                    edges { node { id name qty availableQty } }
+                }
+            }
+        """
+        self.assertQueryBudget(query, max_queries=3, user=self.student)
+
+    def test_borrowed_books(self):
+        query = """
+            query {
+                borrowedBooks {
+                    edges {
+                        node {
+                            id
+                            dueDate
+                            book { id name }
+                            student { id username }
+                        }
+                    }
+                }
+            }
+        """
+        self.assertQueryBudget(query, max_queries=3, user=self.librarian)
+
+    def test_my_books(self):
+        query = """
+            query {
+                myBooks {
+                    edges {
+                        node {
+                            id
+                            dueDate
+                            book { id name }
+                        }
+                    }
+                }
+            }
+        """
+        self.assertQueryBudget(query, max_queries=3, user=self.student)
+
+    def test_my_books_overdue(self):
+        query = """
+            query {
+                myBooks(active: true, overdue: true) {
+                    edges {
+                        node {
+                            id
+                            dueDate
+                            book { id name }
+                        }
+                    }
+                }
+            }
+        """
+        self.assertQueryBudget(query, max_queries=3, user=self.student)
+
+    def test_my_loan_summary(self):
+        query = """
+            query {
+                myLoanSummary { activeCount overdueCount nextDueDate remainingQuota }
+            }
+        """
+        self.assertQueryBudget(query, max_queries=2, user=self.student)
+
+    def test_borrow_book(self):
+        query = """
+            mutation BorrowBook($bookId: ID!, $studentId: ID!) {
+                borrowBook(input: {bookId: $bookId, studentId: $studentId}) {
+                    success
+                    borrowedBook { id book { id name } }
+                }
+            }
+        """
+        variables = lambda: {"bookId": self.create_book().id, "studentId": self.student.id}
+        self.assertQueryBudget(query, max_queries=10, user=self.librarian, variables=variables)
+
+    def test_return_book(self):
+        query = """
+            mutation ReturnBook($bookId: ID!, $studentId: ID!) {
+                returnBook(input: {bookId: $bookId, studentId: $studentId}) {
+                    success
+                    borrowedBook { id returnDate }
+                }
+            }
+        """
+        def variables():
+            # students are waiting for the returned book, so the copy is allocated to the oldest hold
+            book = self.create_book(qty=1)
+            self.create_loan(self.student, book)
+            self.create_hold(self.create_student(), book)
+            self.create_hold(self.create_student(), book)
+            return {"bookId": book.id, "studentId": self.student.id}
+
+        self.assertQueryBudget(query, max_queries=10, user=self.librarian, variables=variables)
+
+    def test_place_hold(self):
+        query = """
+            mutation PlaceHold($bookId: ID!) {
+                placeHold(input: {bookId: $bookId}) {
+                    success
+                    hold { id status book { id name } }
+                }
+            }
+        """
+        variables = lambda: {"bookId": self.create_borrowed_out_book().id}
+        self.assertQueryBudget(query, max_queries=8, user=self.student, variables=variables)
+
+    def test_cancel_hold(self):
+        query = """
+            mutation CancelHold($bookId: ID!) {
+                cancelHold(input: {bookId: $bookId}) {
+                    success
+                    hold { id status }
+                }
+            }
+        """
+        variables = lambda: {"bookId": self.create_hold(self.student, self.create_borrowed_out_book()).book_id}
+        self.assertQueryBudget(query, max_queries=6, user=self.student, variables=variables)
+
+    def test_my_holds(self):
+        query = """
+            query {
+                myHolds {
+                    edges {
+                        node {
+                            id
+                            status
+                            placedDate
+                            book { id name }
+                        }
+                    }
+                }
+            }
+        """
+        self.assertQueryBudget(query, max_queries=3, user=self.student)
+
+
+class HoldTest(JSONWebTokenTestCase):
+    """
+    Returned copies of a fully borrowed out book go to the students holding it, first in, first out.
+    """
+
+    fixtures = ["users_seed.json", "books_seed.json"]
+
+    place_hold = """
+        mutation PlaceHold($bookId: ID!) {
+            placeHold(input: {bookId: $bookId}) { success hold { status } }
+        }
+    """
+    borrow_book = """
+        mutation BorrowBook($bookId: ID!, $studentId: ID!) {
+            borrowBook(input: {bookId: $bookId, studentId: $studentId}) { success }
+        }
+    """
+    return_book = """
+        mutation ReturnBook($bookId: ID!, $studentId: ID!) {
+            returnBook(input: {bookId: $bookId, studentId: $studentId}) { success }
+        }
+    """
+    cancel_hold = """
+        mutation CancelHold($bookId: ID!) {
+            cancelHold(input: {bookId: $bookId}) { success hold { status } }
+        }
+    """
+    my_holds = """
+        query { myHolds { edges { node { status book { name } } } } }
+    """
+
+    def setUp(self):
+        self.student1, self.student2, self.student3 = User.objects.filter(role="student").order_by("id")
+        self.librarian = User.objects.get(username="librarian1")
+        # "The Chemistry Between Us" has a single copy
+        self.book = Book.objects.get(name="The Chemistry Between Us")
+        self.execute_as(self.librarian, self.borrow_book, {"bookId": self.book.id, "studentId": self.student1.id})
+
+    def execute_as(self, user, query, variables=None):
+        self.client.authenticate(user)
+        return self.client.execute(query, variables)
+
+    def test_place_hold_on_available_book(self):
+        result = self.execute_as(self.student2, self.place_hold, {"bookId": Book.objects.get(name="Physics for Dummies").id})
+        self.assertIn("available", result.errors[0].message)
+
+    def test_place_hold_twice(self):
+        self.execute_as(self.student2, self.place_hold, {"bookId": self.book.id})
+        result = self.execute_as(self.student2, self.place_hold, {"bookId": self.book.id})
+        self.assertEqual(result.errors[0].message, "Student already has a hold on this book.")
+
+    def test_returned_copy_is_allocated_to_oldest_hold(self):
+        self.execute_as(self.student2, self.place_hold, {"bookId": self.book.id})
+        self.execute_as(self.student3, self.place_hold, {"bookId": self.book.id})
+
+        result = self.execute_as(self.librarian, self.return_book, {"bookId": self.book.id, "studentId": self.student1.id})
+        self.assertIsNone(result.errors)
+
+        # the copy is set aside for the first student in the queue and never becomes available to others
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_qty, 0)
+        result = self.execute_as(self.student2, self.my_holds)
+        self.assertEqual(result.data["myHolds"]["edges"][0]["node"]["status"], "ALLOCATED")
+        result = self.execute_as(self.student3, self.my_holds)
+        self.assertEqual(result.data["myHolds"]["edges"][0]["node"]["status"], "WAITING")
+
+        # only the student with the allocated hold can borrow it
+        result = self.execute_as(self.librarian, self.borrow_book, {"bookId": self.book.id, "studentId": self.student3.id})
+        self.assertEqual(
+            result.errors[0].message,
+            "The book The Chemistry Between Us is not available. The returned copies are reserved for students holding it. "
+            "Place a hold on it to get the next returned copy.",
+        )
+        result = self.execute_as(self.librarian, self.borrow_book, {"bookId": self.book.id, "studentId": self.student2.id})
+        self.assertIsNone(result.errors)
+        self.assertEqual(Hold.objects.get(student=self.student2).status, Hold.FULFILLED)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_qty, 0)
+
+    def return_to_holds(self):
+        """
+        Queue student2 then student3 on the book, and return student1's copy so it is set aside for student2.
+        """
+        self.execute_as(self.student2, self.place_hold, {"bookId": self.book.id})
+        self.execute_as(self.student3, self.place_hold, {"bookId": self.book.id})
+        self.execute_as(self.librarian, self.return_book, {"bookId": self.book.id, "studentId": self.student1.id})
+
+    def test_cancel_allocated_hold_passes_copy_on(self):
+        self.return_to_holds()
+
+        result = self.execute_as(self.student2, self.cancel_hold, {"bookId": self.book.id})
+        self.assertEqual(result.data["cancelHold"]["hold"]["status"], "CANCELLED")
+        self.assertEqual(Hold.objects.get(student=self.student3).status, Hold.ALLOCATED)
+
+        # with nobody left waiting, cancelling makes the copy available again
+        self.execute_as(self.student3, self.cancel_hold, {"bookId": self.book.id})
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_qty, 1)
+
+    def test_cancel_without_hold(self):
+        result = self.execute_as(self.student2, self.cancel_hold, {"bookId": self.book.id})
+        self.assertEqual(result.errors[0].message, "Student does not have a hold on this book.")
+
+    def test_allocated_hold_expires(self):
+        self.return_to_holds()
+        Hold.objects.filter(student=self.student2).update(allocated_date=timezone.now() - timedelta(days=8))
+
+        # borrowing the book expires the allocation first, so student2 is too late and the copy goes to student3
+        result = self.execute_as(self.librarian, self.borrow_book, {"bookId": self.book.id, "studentId": self.student2.id})
+        self.assertIn("reserved for students holding it", result.errors[0].message)
+        self.assertEqual(Hold.objects.get(student=self.student2).status, Hold.EXPIRED)
+        self.assertEqual(Hold.objects.get(student=self.student3).status, Hold.ALLOCATED)
+
+    def test_expire_holds_command(self):
+        self.return_to_holds()
+        Hold.objects.filter(student=self.student2).update(allocated_date=timezone.now() - timedelta(days=8))
+
+        out = StringIO()
+        call_command("expire_holds", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Expired 1 holds.")
+        self.assertEqual(Hold.objects.get(student=self.student3).status, Hold.ALLOCATED)
+
+    def test_borrowing_fulfills_waiting_hold(self):
+        self.execute_as(self.student2, self.place_hold, {"bookId": self.book.id})
+        # a new copy is added to the library while student2 is still waiting
+        Book.objects.filter(id=self.book.id).update(available_qty=1)
+
+        result = self.execute_as(self.librarian, self.borrow_book, {"bookId": self.book.id, "studentId": self.student2.id})
+        self.assertIsNone(result.errors)
+        self.assertEqual(Hold.objects.get(student=self.student2).status, Hold.FULFILLED)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_qty, 0)
+
+    def test_one_open_hold_per_student_and_book(self):
+        self.execute_as(self.student2, self.place_hold, {"bookId": self.book.id})
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Hold.objects.create(student=self.student2, book=self.book, placed_date=timezone.now())
+
+    def test_returned_copy_is_available_without_holds(self):
+        self.execute_as(self.librarian, self.return_book, {"bookId": self.book.id, "studentId": self.student1.id})
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_qty, 1)
+
+
+class LoanSummaryTest(JSONWebTokenTestCase):
+    """
+    The loan summary and the active/overdue filters of myBooks only count books that have not been returned.
+    """
+
+    fixtures = ["users_seed.json", "books_seed.json"]
+
+    def setUp(self):
+        self.student = User.objects.get(username="student1")
+        now = timezone.now()
+        books = Book.objects.order_by("id")
+        # one book returned, one overdue and two due in the future
+        loans = [
+            (books[0], now - timedelta(days=60), now - timedelta(days=30)),
+            (books[1], now - timedelta(days=40), None),
+            (books[2], now - timedelta(days=10), None),
+            (books[3], now - timedelta(days=5), None),
+        ]
+        for book, borrow_date, return_date in loans:
+            BorrowedBook.objects.create(
+                student=self.student, book=book, borrow_date=borrow_date,
+                due_date=borrow_date + timedelta(days=30), return_date=return_date,
+            )
+        self.next_due_date = loans[2][1] + timedelta(days=30)
+        self.client.authenticate(self.student)
+
+    def book_names(self, filters):
+        result = self.client.execute(f"query {{ myBooks({filters}) {{ edges {{ node {{ book {{ name }} }} }} }} }}")
+        self.assertIsNone(result.errors)
+        return [edge["node"]["book"]["name"] for edge in result.data["myBooks"]["edges"]]
+
+    def test_my_loan_summary(self):
+        result = self.client.execute("query { myLoanSummary { activeCount overdueCount nextDueDate remainingQuota } }")
+        self.assertIsNone(result.errors)
+        summary = result.data["myLoanSummary"]
+        self.assertEqual(summary["activeCount"], 3)
+        self.assertEqual(summary["overdueCount"], 1)
+        self.assertEqual(summary["nextDueDate"], self.next_due_date.isoformat())
+        self.assertEqual(summary["remainingQuota"], 7)
+
+    def test_my_books_filters(self):
+        books = list(Book.objects.order_by("id").values_list("name", flat=True))
+        self.assertEqual(self.book_names("active: true"), books[1:4])
+        self.assertEqual(self.book_names("active: false"), books[:1])
+        self.assertEqual(self.book_names("overdue: true"), books[1:2])
+        self.assertEqual(self.book_names("active: true, overdue: false"), books[2:4])
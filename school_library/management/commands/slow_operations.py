@@ -0,0 +1,68 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from school_library.models import SlowOperation
+
+
+class Command(BaseCommand):
+    """
+    Summarize the slow operations recorded by SlowOperationLogMixin, worst offenders first.
+    """
+
+    help = "Summarize the slowest GraphQL operations recorded in the SlowOperation table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10, help="Number of operations to list.")
+        parser.add_argument(
+            "--sort", choices=["max", "total", "count"], default="total",
+            help="Sort operations by their slowest run, their total time or the number of slow runs.",
+        )
+        parser.add_argument("--operation", help="Show the SQL and EXPLAIN plans of the slowest run of this operation.")
+        parser.add_argument("--prune", type=int, metavar="DAYS", help="Delete slow operations recorded more than DAYS days ago.")
+
+    def handle(self, *args, **options):
+        if options["prune"] is not None:
+            deleted, _ = SlowOperation.objects.filter(timestamp__lt=timezone.now() - timedelta(days=options["prune"])).delete()
+            self.stdout.write(f"Deleted {deleted} slow operations.")
+            return
+
+        if options["operation"]:
+            slowest = SlowOperation.objects.filter(operation=options["operation"]).order_by("-duration_ms").first()
+            if slowest is None:
+                raise CommandError(f"No slow runs recorded for operation {options['operation']}.")
+            self.show_operation(slowest)
+            return
+
+        operations = (
+            SlowOperation.objects.values("operation")
+            .annotate(count=Count("id"), total=Sum("duration_ms"), avg=Avg("duration_ms"), max=Max("duration_ms"), queries=Max("query_count"))
+            .order_by(f"-{options['sort']}", "operation")[:options["limit"]]
+        )
+        if not operations:
+            self.stdout.write("No slow operations recorded.")
+            return
+
+        self.stdout.write(f"{'operation':<30} {'runs':>6} {'total ms':>10} {'avg ms':>10} {'max ms':>10} {'max queries':>12}")
+        for operation in operations:
+            self.stdout.write(
+                f"{operation['operation']:<30} {operation['count']:>6} {operation['total']:>10.1f} "
+                f"{operation['avg']:>10.1f} {operation['max']:>10.1f} {operation['queries']:>12}"
+            )
+
+    def show_operation(self, slow_operation):
+        """
+        Print the details of a single slow run.
+        """
+        self.stdout.write(f"{slow_operation.operation} took {slow_operation.duration_ms:.1f} ms at {slow_operation.timestamp.isoformat()}")
+        self.stdout.write(f"variables: {json.dumps(slow_operation.variables)}")
+        self.stdout.write(f"{slow_operation.query_count} queries, {slow_operation.sql_duration_ms:.1f} ms in SQL")
+        for query in slow_operation.queries:
+            self.stdout.write(f"  {query['duration_ms']:>8.1f} ms  {query['sql']}")
+        for explained in slow_operation.explain:
+            self.stdout.write(f"\nEXPLAIN ({explained['duration_ms']:.1f} ms) {explained['sql']}")
+            for line in explained["plan"]:
+                self.stdout.write(f"  {line}")
@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# run in a fresh interpreter, so that nothing has been imported yet
+PROFILED_STARTUP = """
+import json, time
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter() - start
+from school_library.warmup import warm_up
+timings = warm_up()
+print(json.dumps({"django.setup()": setup, **timings}))
+"""
+
+
+def parse_import_times(output):
+    """
+    Parse the output of `python -X importtime` into a list of (module, self time, cumulative time) in seconds.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_time, cumulative_time, module = line[len("import time:"):].split("|")
+        modules.append((module.strip(), int(self_time) / 1_000_000, int(cumulative_time) / 1_000_000))
+    return modules
+
+
+class Command(BaseCommand):
+    """
+    Profile a cold start of the app: the time spent importing each package and the time taken by each warm-up step.
+    """
+
+    help = "Report import time per package and schema build time of a cold start."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=15, help="Number of packages and modules to list.")
+
+    def handle(self, *args, **options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "school_library.settings")}
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROFILED_STARTUP],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if process.returncode != 0:
+            raise CommandError(f"Profiled startup failed:\n{process.stderr[-2000:]}")
+
+        modules = parse_import_times(process.stderr)
+        steps = json.loads(process.stdout.strip().splitlines()[-1])
+
+        packages = {}
+        for module, self_time, _ in modules:
+            package = module.split(".")[0]
+            packages[package] = packages.get(package, 0) + self_time
+
+        self.stdout.write(f"Imported {len(modules)} modules in {sum(packages.values()) * 1000:.1f} ms")
+        self.stdout.write(f"\n{'package':<40} {'import ms':>10}")
+        for package, import_time in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:options["limit"]]:
+            self.stdout.write(f"{package:<40} {import_time * 1000:>10.1f}")
+
+        self.stdout.write(f"\n{'module':<40} {'cumulative ms':>14}")
+        for module, _, cumulative_time in sorted(modules, key=lambda item: item[2], reverse=True)[:options["limit"]]:
+            self.stdout.write(f"{module:<40} {cumulative_time * 1000:>14.1f}")
+
+        self.stdout.write(f"\n{'startup step':<40} {'ms':>10}")
+        for step, step_time in steps.items():
+            self.stdout.write(f"{step:<40} {step_time * 1000:>10.1f}")
@@ -0,0 +1,36 @@
+# Generated by Django 3.2 on 2026-10-19 17:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowOperation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(verbose_name='timestamp')),
+                ('operation', models.CharField(max_length=255, verbose_name='operation')),
+                ('duration_ms', models.FloatField(verbose_name='duration (ms)')),
+                ('variables', models.JSONField(blank=True, null=True, verbose_name='redacted variables')),
+                ('query_count', models.IntegerField(verbose_name='query count')),
+                ('sql_duration_ms', models.FloatField(verbose_name='SQL duration (ms)')),
+                ('queries', models.JSONField(default=list, verbose_name='SQL statements')),
+                ('explain', models.JSONField(default=list, verbose_name='EXPLAIN plans of the slowest statements')),
+            ],
+            options={
+                'verbose_name': 'slow operation',
+                'verbose_name_plural': 'slow operations',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='slowoperation',
+            index=models.Index(fields=['operation', 'duration_ms'], name='school_libr_operati_e98c01_idx'),
+        ),
+    ]
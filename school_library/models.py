@@ -0,0 +1,28 @@
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+
+
+class SlowOperation(models.Model):
+    """
+    A GraphQL operation that took longer than SLOW_OPERATION_THRESHOLD_MS, recorded by SlowOperationLogMixin.
+    Kept in the database rather than in a log file, so every gunicorn worker can write to it safely.
+    """
+    
+    timestamp = models.DateTimeField(_("timestamp"), auto_now=False, auto_now_add=False)
+    operation = models.CharField(_("operation"), max_length=255)
+    duration_ms = models.FloatField(_("duration (ms)"))
+    variables = models.JSONField(_("redacted variables"), blank=True, null=True)
+    query_count = models.IntegerField(_("query count"))
+    sql_duration_ms = models.FloatField(_("SQL duration (ms)"))
+    queries = models.JSONField(_("SQL statements"), default=list)
+    explain = models.JSONField(_("EXPLAIN plans of the slowest statements"), default=list)
+    
+    class Meta:
+        verbose_name = _("slow operation")
+        verbose_name_plural = _("slow operations")
+        indexes = [
+            models.Index(fields=['operation', 'duration_ms']),
+        ]
+
+    def __str__(self):
+        return f"{self.operation} ({self.duration_ms:.0f} ms)"
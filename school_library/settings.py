@@ -57,6 +57,7 @@ INSTALLED_APPS = [
     'django_filters',
     
     # local apps
+    'school_library',
     'users',
     'books',
 ]
@@ -204,6 +205,47 @@ GRAPHENE = {
     ]
 }
 
+# responses from school_library.views.FastGraphQLView containing a list of at least this many items (e.g. a large page of edges)
+# are streamed back in chunks of GRAPHQL_STREAM_CHUNK_SIZE items instead of being serialized in one piece
+GRAPHQL_STREAM_THRESHOLD = env.int('GRAPHQL_STREAM_THRESHOLD', default=500)
+GRAPHQL_STREAM_CHUNK_SIZE = env.int('GRAPHQL_STREAM_CHUNK_SIZE', default=100)
+
+# gzip the streamed GraphQL responses above for clients that accept it
+# other responses (tokenAuth, refreshToken, errors echoing the input...) are never compressed, since gzip without
+# BREACH mitigation can leak secrets from compressed responses that mix them with attacker-controlled input
+# https://docs.djangoproject.com/en/dev/ref/middleware/#module-django.middleware.gzip
+GRAPHQL_GZIP = env.bool('GRAPHQL_GZIP', default=False)
+
+# number of days a student has to pick up a copy set aside for their hold before it goes to the next hold
+HOLD_PICKUP_DAYS = env.int('HOLD_PICKUP_DAYS', default=7)
+
+# GraphQL operations slower than this are recorded in the SlowOperation table along with their SQL and EXPLAIN plans
+# summarize them with `python manage.py slow_operations`
+SLOW_OPERATION_LOG = env.bool('SLOW_OPERATION_LOG', default=True)
+SLOW_OPERATION_THRESHOLD_MS = env.int('SLOW_OPERATION_THRESHOLD_MS', default=500)
+SLOW_OPERATION_EXPLAIN_COUNT = env.int('SLOW_OPERATION_EXPLAIN_COUNT', default=3)
+# variables whose names contain any of these words are redacted before being recorded
+SLOW_OPERATION_REDACTED_VARIABLES = ['password', 'token', 'secret']
+
+# https://docs.djangoproject.com/en/dev/topics/logging/
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # reports how long the schema warm-up took when the app starts, so it shows up in the deploy logs
+        'school_library.warmup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 # https://django-graphql-jwt.domake.io/quickstart.html
 GRAPHQL_JWT = {
     'JWT_VERIFY_EXPIRATION': True,
@@ -0,0 +1,124 @@
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from .models import SlowOperation
+
+logger = logging.getLogger(__name__)
+
+# used to find the operation name when the client did not send an operationName
+OPERATION_NAME_RE = re.compile(r"\b(query|mutation|subscription)\s+(\w+)")
+FIRST_FIELD_RE = re.compile(r"{\s*(\w+)")
+
+REDACTED = "[redacted]"
+
+
+class QueryCapture:
+    """
+    Database execute wrapper that keeps every SQL statement run along with its duration.
+    Unlike connection.queries, this works without DEBUG turned on.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                "sql": sql,
+                "params": params,
+                "many": many,
+                "duration_ms": (time.perf_counter() - start) * 1000,
+            })
+
+
+def get_operation_name(query, operation_name=None):
+    """
+    Return the name of the operation, falling back to the first field selected for anonymous operations.
+    """
+    if operation_name:
+        return operation_name
+    match = OPERATION_NAME_RE.search(query)
+    if match:
+        return match.group(2)
+    match = FIRST_FIELD_RE.search(query)
+    return match.group(1) if match else "anonymous"
+
+
+def redact(variables):
+    """
+    Replace the values of variables whose names look sensitive (passwords, tokens...) with a placeholder.
+    """
+    if isinstance(variables, dict):
+        return {
+            name: REDACTED if any(word in name.lower() for word in settings.SLOW_OPERATION_REDACTED_VARIABLES) else redact(value)
+            for name, value in variables.items()
+        }
+    if isinstance(variables, list):
+        return [redact(value) for value in variables]
+    return variables
+
+
+def explain(query):
+    """
+    Return the EXPLAIN output of a captured SELECT statement as a list of lines.
+    """
+    try:
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {query['sql']}", query["params"])
+            return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+    except DatabaseError as e:
+        return [f"EXPLAIN failed: {e}"]
+
+
+def record_slow_operation(query, variables, operation_name, duration_ms, queries):
+    """
+    Save a slow operation to the SlowOperation table, along with the EXPLAIN plans of its slowest SELECT statements.
+    Statement parameters are only used to run EXPLAIN and are never saved.
+    """
+    selects = [q for q in queries if not q["many"] and q["sql"].lstrip().upper().startswith("SELECT")]
+    slowest = sorted(selects, key=lambda q: q["duration_ms"], reverse=True)[:settings.SLOW_OPERATION_EXPLAIN_COUNT]
+
+    try:
+        SlowOperation.objects.create(
+            timestamp=timezone.now(),
+            operation=get_operation_name(query, operation_name)[:255],
+            duration_ms=round(duration_ms, 3),
+            variables=redact(variables),
+            query_count=len(queries),
+            sql_duration_ms=round(sum(q["duration_ms"] for q in queries), 3),
+            queries=[{"sql": q["sql"], "duration_ms": round(q["duration_ms"], 3)} for q in queries],
+            explain=[{"sql": q["sql"], "duration_ms": round(q["duration_ms"], 3), "plan": explain(q)} for q in slowest],
+        )
+    except DatabaseError:
+        # recording is best effort and must never fail the request
+        logger.exception("Could not record slow operation")
+
+
+class SlowOperationLogMixin:
+    """
+    GraphQLView mixin that records operations taking longer than SLOW_OPERATION_THRESHOLD_MS in the SlowOperation table.
+    Set SLOW_OPERATION_LOG to False to turn the log off.
+    """
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        if not settings.SLOW_OPERATION_LOG or not query:
+            return super().execute_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+
+        capture = QueryCapture()
+        start = time.perf_counter()
+        with connection.execute_wrapper(capture):
+            result = super().execute_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        if duration_ms >= settings.SLOW_OPERATION_THRESHOLD_MS:
+            record_slow_operation(query, variables, operation_name, duration_ms, capture.queries)
+        return result
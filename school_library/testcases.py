@@ -0,0 +1,60 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from graphql_jwt.testcases import JSONWebTokenTestCase
+
+
+class QueryBudgetTestCase(JSONWebTokenTestCase):
+    """
+    Base test case for checking how many SQL queries a GraphQL operation runs.
+    Every operation is executed twice: once against the seeded data, and once more after grow_rows() has added extra rows.
+    The operation fails if it goes over its declared budget, or if the second run needs more queries than the first (an N+1 pattern).
+    Tests run inside a transaction, so every transaction.atomic block in a mutation becomes a savepoint:
+    budgets include its SAVEPOINT and RELEASE SAVEPOINT queries.
+    """
+
+    # number of extra rows added by grow_rows() between the two runs
+    growth: int = 5
+
+    def grow_rows(self, count):
+        """
+        Add `count` extra rows of every kind the operations under test read from.
+        Subclasses must implement this.
+        """
+        raise NotImplementedError("Subclasses of QueryBudgetTestCase must implement grow_rows().")
+
+    def execute_counted(self, query, variables=None):
+        """
+        Execute the query and return the result along with the captured SQL queries.
+        """
+        with CaptureQueriesContext(connection) as captured:
+            result = self.client.execute(query, variables)
+        self.assertIsNone(result.errors, result.errors)
+        return result, captured.captured_queries
+
+    def assertQueryBudget(self, query, max_queries, user=None, variables=None):
+        """
+        Assert that the query stays within `max_queries` SQL queries and that its query count does not grow with the number of rows.
+        `variables` may be a callable, in which case it is called before each run so mutations can target fresh rows.
+        """
+        if user is not None:
+            self.client.authenticate(user)
+
+        def run():
+            current_variables = variables() if callable(variables) else variables
+            return self.execute_counted(query, current_variables)
+
+        _, first_queries = run()
+        self.grow_rows(self.growth)
+        _, second_queries = run()
+
+        def sql(queries):
+            return "\n".join(query["sql"] for query in queries)
+
+        self.assertLessEqual(
+            len(first_queries), max_queries,
+            f"{len(first_queries)} queries executed, budget is {max_queries}:\n{sql(first_queries)}",
+        )
+        self.assertEqual(
+            len(first_queries), len(second_queries),
+            f"Query count went from {len(first_queries)} to {len(second_queries)} after adding {self.growth} rows:\n{sql(second_queries)}",
+        )
@@ -0,0 +1,150 @@
+import gzip
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from books.models import Book
+
+from .management.commands.startup_profile import parse_import_times
+from .models import SlowOperation
+from .views import FastGraphQLView
+from .warmup import warm_up
+
+
+class FastGraphQLViewTest(TestCase):
+    """
+    Responses from FastGraphQLView must match what the stock GraphQLView would have sent.
+    """
+
+    query = "query { books { edges { node { name qty availableQty } } } }"
+
+    def setUp(self):
+        Book.objects.bulk_create(Book(name=f"Book {i}", qty=i, available_qty=i) for i in range(12))
+
+    def post(self):
+        return self.client.post("/graphql/", {"query": self.query}, content_type="application/json")
+
+    def expected(self):
+        books = Book.objects.order_by("id")
+        edges = [{"node": {"name": book.name, "qty": book.qty, "availableQty": book.available_qty}} for book in books]
+        return {"data": {"books": {"edges": edges}}}
+
+    @override_settings(GRAPHQL_STREAM_THRESHOLD=500)
+    def test_small_response_is_not_streamed(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(json.loads(response.content), self.expected())
+
+    @override_settings(GRAPHQL_STREAM_THRESHOLD=10, GRAPHQL_STREAM_CHUNK_SIZE=5)
+    def test_large_response_is_streamed(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), self.expected())
+
+    @override_settings(GRAPHQL_STREAM_THRESHOLD=500, GRAPHQL_STREAM_CHUNK_SIZE=100)
+    def test_stream_options_precedence(self):
+        class View(FastGraphQLView):
+            stream_threshold = 50
+
+        # as_view() arguments, including 0, win over class attributes, which win over the settings
+        self.assertEqual(View(stream_threshold=0).stream_threshold, 0)
+        self.assertEqual(View().stream_threshold, 50)
+        self.assertEqual(View().stream_chunk_size, 100)
+        self.assertEqual(FastGraphQLView(stream_chunk_size=10).stream_chunk_size, 10)
+
+    @override_settings(GRAPHQL_STREAM_THRESHOLD=10, GRAPHQL_GZIP=True)
+    def test_only_streamed_response_is_gzipped(self):
+        response = self.client.post("/graphql/", {"query": self.query}, content_type="application/json", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(b"".join(response.streaming_content))), self.expected())
+
+        small_query = "query { books(first: 1) { edges { node { name } } } }"
+        response = self.client.post("/graphql/", {"query": small_query}, content_type="application/json", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_invalid_query_returns_errors(self):
+        response = self.client.post("/graphql/", {"query": "query { nope }"}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("errors", json.loads(response.content))
+
+
+class SlowOperationLogTest(TestCase):
+    """
+    Operations over SLOW_OPERATION_THRESHOLD_MS are recorded in the SlowOperation table.
+    """
+
+    def setUp(self):
+        Book.objects.create(name="Physics for Dummies", qty=5, available_qty=5)
+
+    def post(self, query, variables=None):
+        data = {"query": query, "variables": variables or {}}
+        return self.client.post("/graphql/", data, content_type="application/json")
+
+    @override_settings(SLOW_OPERATION_THRESHOLD_MS=0)
+    def test_slow_operation_is_recorded(self):
+        query = "query allBooks($name: String) { books(name: $name) { edges { node { name } } } }"
+        self.post(query, {"name": "Physics for Dummies", "password": "hunter2"})
+
+        slow_operation = SlowOperation.objects.get()
+        self.assertEqual(slow_operation.operation, "allBooks")
+        self.assertEqual(slow_operation.variables, {"name": "Physics for Dummies", "password": "[redacted]"})
+        self.assertEqual(slow_operation.query_count, len(slow_operation.queries))
+        self.assertTrue(slow_operation.explain)
+        self.assertTrue(all(explained["plan"] for explained in slow_operation.explain))
+        self.assertNotIn("hunter2", json.dumps(slow_operation.queries + slow_operation.explain))
+
+    @override_settings(SLOW_OPERATION_THRESHOLD_MS=60 * 1000)
+    def test_fast_operation_is_not_recorded(self):
+        self.post("query { books { edges { node { name } } } }")
+        self.assertFalse(SlowOperation.objects.exists())
+
+    def create_slow_operation(self, operation, duration_ms, query_count, timestamp=None):
+        return SlowOperation.objects.create(
+            timestamp=timestamp or timezone.now(), operation=operation, duration_ms=duration_ms,
+            query_count=query_count, sql_duration_ms=duration_ms / 2,
+        )
+
+    def test_summary_command(self):
+        self.create_slow_operation("allBooks", 600, 2)
+        self.create_slow_operation("allBooks", 900, 2)
+        self.create_slow_operation("myBooks", 700, 3)
+
+        out = StringIO()
+        call_command("slow_operations", stdout=out)
+        rows = out.getvalue().splitlines()[1:]
+        self.assertEqual([row.split()[:2] for row in rows], [["allBooks", "2"], ["myBooks", "1"]])
+
+    def test_prune_command(self):
+        self.create_slow_operation("allBooks", 600, 2, timestamp=timezone.now() - timedelta(days=40))
+        self.create_slow_operation("myBooks", 700, 3)
+
+        call_command("slow_operations", prune=30, stdout=StringIO())
+        self.assertEqual(list(SlowOperation.objects.values_list("operation", flat=True)), ["myBooks"])
+
+
+class WarmUpTest(SimpleTestCase):
+    """
+    The warm-up builds the schema and the filtersets before the first request.
+    """
+
+    def test_warm_up(self):
+        with self.assertLogs("school_library.warmup", "INFO") as logs:
+            timings = warm_up()
+        self.assertEqual(list(timings), ["schema", "filtersets", "urlconf", "first query"])
+        self.assertIn("Warmed up", logs.output[0])
+
+    def test_parse_import_times(self):
+        output = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   graphql.pyutils",
+            "import time:      2500 |       2620 | graphql",
+        ])
+        self.assertEqual(parse_import_times(output), [("graphql.pyutils", 0.00012, 0.00012), ("graphql", 0.0025, 0.00262)])
@@ -16,10 +16,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
+
+from .views import LibraryGraphQLView
 
 urlpatterns = [
     # path('admin/', admin.site.urls),
     # a single graphql endpoint is all we need for frontends to query the backend
-    path('graphql/', csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path('graphql/', csrf_exempt(LibraryGraphQLView.as_view(graphiql=True))),
 ]
@@ -0,0 +1,123 @@
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.middleware.gzip import GZipMiddleware
+from graphene_django.views import GraphQLView
+
+from .slow_operations import SlowOperationLogMixin
+
+# orjson is a lot faster than the standard library json module, but fall back to json if it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# attribute set on the request when the response body should be streamed instead of returned in one piece
+STREAMED_CONTENT_ATTR = "_graphql_streamed_content"
+
+
+def dumps(value, pretty=False):
+    """
+    Serialize a value to JSON bytes, using orjson when it is available.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS if pretty else None
+        return orjson.dumps(value, option=option)
+
+    if pretty:
+        return json.dumps(value, sort_keys=True, indent=2, separators=(",", ": ")).encode()
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def largest_list(value):
+    """
+    Return the length of the largest list found by walking down the dicts of a GraphQL result.
+    Lists are not walked into, so this only looks at the connection wrappers and never at the edges themselves.
+    """
+    if isinstance(value, dict):
+        return max((largest_list(item) for item in value.values()), default=0)
+    if isinstance(value, list):
+        return len(value)
+    return 0
+
+
+def iter_json(value, threshold, chunk_size):
+    """
+    Serialize a value to JSON as a sequence of byte chunks.
+    Lists with at least `threshold` items (the edges of a large connection) are written `chunk_size` items at a time,
+    so the whole response never has to be held as a single bytes object.
+    """
+    if isinstance(value, dict):
+        yield b"{"
+        for index, (key, item) in enumerate(value.items()):
+            yield (b"," if index else b"") + dumps(key) + b":"
+            yield from iter_json(item, threshold, chunk_size)
+        yield b"}"
+    elif isinstance(value, list) and len(value) >= threshold:
+        yield b"["
+        for start in range(0, len(value), chunk_size):
+            chunk = b",".join(dumps(item) for item in value[start:start + chunk_size])
+            yield (b"," if start else b"") + chunk
+        yield b"]"
+    else:
+        yield dumps(value)
+
+
+class FastGraphQLView(GraphQLView):
+    """
+    GraphQLView that serializes responses with orjson (falling back to the standard library json module).
+    Responses containing a list with at least `stream_threshold` items are sent as a StreamingHttpResponse,
+    which are also gzipped chunk by chunk when GRAPHQL_GZIP is enabled. Only these large data responses are compressed,
+    never the small ones carrying tokens or error messages, to stay clear of BREACH.
+    """
+
+    stream_threshold = None
+    stream_chunk_size = None
+
+    def __init__(self, stream_threshold=None, stream_chunk_size=None, **kwargs):
+        super().__init__(**kwargs)
+        # as_view() arguments win over class attributes, which win over the settings
+        if stream_threshold is not None:
+            self.stream_threshold = stream_threshold
+        elif self.stream_threshold is None:
+            self.stream_threshold = settings.GRAPHQL_STREAM_THRESHOLD
+        if stream_chunk_size is not None:
+            self.stream_chunk_size = stream_chunk_size
+        elif self.stream_chunk_size is None:
+            self.stream_chunk_size = settings.GRAPHQL_STREAM_CHUNK_SIZE
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+
+        streamed_content = getattr(request, STREAMED_CONTENT_ATTR, None)
+        if streamed_content is None:
+            return response
+
+        streaming_response = StreamingHttpResponse(
+            streamed_content, status=response.status_code, content_type=response["Content-Type"]
+        )
+        streaming_response.cookies = response.cookies
+        if settings.GRAPHQL_GZIP:
+            return GZipMiddleware(lambda request: streaming_response).process_response(request, streaming_response)
+        return streaming_response
+
+    def json_encode(self, request, d, pretty=False):
+        pretty = self.pretty or pretty or request.GET.get("pretty")
+
+        # batched responses are joined together as strings by GraphQLView
+        if self.batch:
+            return dumps(d, pretty=pretty).decode()
+
+        if not pretty and largest_list(d) >= self.stream_threshold:
+            setattr(request, STREAMED_CONTENT_ATTR, iter_json(d, self.stream_threshold, self.stream_chunk_size))
+            return b""
+
+        return dumps(d, pretty=pretty)
+
+
+class LibraryGraphQLView(SlowOperationLogMixin, FastGraphQLView):
+    """
+    The GraphQL endpoint of the library: FastGraphQLView with slow operations recorded to the slow operation log.
+    """
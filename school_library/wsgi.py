@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'school_library.settings')
 
 application = get_wsgi_application()
+
+# build the GraphQL schema now instead of on the first request
+# with `gunicorn --preload` this runs in the master process, before the workers are forked
+from school_library.warmup import warm_up
+
+warm_up()
@@ -1,3 +1,29 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
 
-# Create your tests here.
+from school_library.testcases import QueryBudgetTestCase
+
+# get the user model
+User = get_user_model()
+
+
+class UserQueryBudgetTest(QueryBudgetTestCase):
+    """
+    SQL query budgets for the user queries.
+    """
+
+    fixtures = ["users_seed.json"]
+
+    def setUp(self):
+        self.student = User.objects.get(username="student1")
+
+    def grow_rows(self, count):
+        for i in range(count):
+            User.objects.create_user(username=f"seeded_student{User.objects.count() + 1}", role="student")
+
+    def test_me(self):
+        query = """
+            query {
+                me { id username firstName lastName role }
+            }
+        """
+        self.assertQueryBudget(query, max_queries=1, user=self.student)